@@ -6,8 +6,14 @@ from typing import List, Optional, Dict, Any
 import json
 import re
 from collections import defaultdict
+from pathlib import Path
 import uvicorn
 
+try:
+    import orjson
+except ImportError:  # e.g. PyPy, where orjson has no wheels
+    orjson = None
+
 app = FastAPI(title="HPO API", description="Human Phenotype Ontology API", version="1.0.0")
 
 # Enable CORS for frontend
@@ -25,6 +31,8 @@ nodes = {}
 edges = []
 parent_children = defaultdict(list)
 child_parents = defaultdict(list)
+node_ids = []
+search_index = defaultdict(set)
 
 class NodeInfo(BaseModel):
     id: str
@@ -45,6 +53,48 @@ class SubgraphResponse(BaseModel):
     nodes: List[NodeInfo]
     edges: List[Dict[str, str]]
 
+def read_json_file(path):
+    """Parse a JSON file, using orjson's C parser when it is installed"""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def build_search_index():
+    """Index every node's lowercased label, ID and synonyms by trigram"""
+    for idx, (node_id, node_data) in enumerate(nodes.items()):
+        fields = [node_data['label'].lower(), node_data['full_id'].lower()]
+        fields.extend(s.lower() for s in node_data['synonyms'])
+        # Fields are newline-separated so the substring check stays per field
+        node_data['_haystack'] = '\n'.join(fields)
+        node_ids.append(node_id)
+        for field in fields:
+            for i in range(len(field) - 2):
+                search_index[field[i:i + 3]].add(idx)
+
+def find_matching_ids(query):
+    """Return ids of nodes whose label, ID or synonyms contain the lowercased query"""
+    # No field contains a newline, and matching one could span two fields
+    if '\n' in query:
+        return []
+    
+    if len(query) < 3:
+        candidates = range(len(node_ids))
+    else:
+        postings = [search_index.get(query[i:i + 3]) for i in range(len(query) - 2)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        candidates = sorted(postings[0].intersection(*postings[1:]))
+
+    # Trigrams only narrow the candidates; confirm the full substring match
+    matching_ids = []
+    for idx in candidates:
+        node_id = node_ids[idx]
+        if query in nodes[node_id]['_haystack']:
+            matching_ids.append(node_id)
+    return matching_ids
+
 @app.on_event("startup")
 async def load_hpo_data():
     """Load HPO data on startup"""
@@ -52,8 +102,7 @@ async def load_hpo_data():
     
     print("Loading HPO data...")
     try:
-        with open('hp.json', 'r') as f:
-            hpo_data = json.load(f)
+        hpo_data = read_json_file('hp.json')
         
         # Process nodes
         for node in hpo_data['graphs'][0]['nodes']:
@@ -81,6 +130,8 @@ async def load_hpo_data():
                     nodes[child_id]['parents'].append(parent_id)
                     nodes[parent_id]['children'].append(child_id)
         
+        build_search_index()
+        
         edges = hpo_data['graphs'][0]['edges']
         print(f"Loaded {len(nodes)} nodes and {len(edges)} edges")
         
@@ -101,7 +152,7 @@ async def get_stats():
         "root_node": "http://purl.obolibrary.org/obo/HP_0000001"
     }
 
-@app.get("/api/search", response_model=SearchResult)
+@app.get("/api/search", response_model=None, responses={200: {"model": SearchResult}})
 async def search_nodes(
     q: str = Query(..., description="Search query"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -114,24 +165,21 @@ async def search_nodes(
     query_lower = q.lower()
     results = []
     
-    # Search through nodes
-    for node_id, node in nodes.items():
-        # Check label, full_id, and synonyms
-        if (query_lower in node['label'].lower() or 
-            query_lower in node['full_id'].lower() or
-            any(query_lower in syn.lower() for syn in node['synonyms'])):
-            
-            # Create NodeInfo with relationships
-            node_info = NodeInfo(
-                id=node_id,
-                label=node['label'],
-                full_id=node['full_id'],
-                definition=node['definition'],
-                synonyms=node['synonyms'],
-                parents=node['parents'],
-                children=node['children']
-            )
-            results.append(node_info)
+    # Search through nodes (label, full_id, and synonyms)
+    for node_id in find_matching_ids(query_lower):
+        node = nodes[node_id]
+        
+        # Create NodeInfo with relationships
+        node_info = NodeInfo(
+            id=node_id,
+            label=node['label'],
+            full_id=node['full_id'],
+            definition=node['definition'],
+            synonyms=node['synonyms'],
+            parents=node['parents'],
+            children=node['children']
+        )
+        results.append(node_info)
     
     # Sort by relevance (exact matches first, then by label length)
     results.sort(key=lambda x: (
@@ -152,7 +200,7 @@ async def search_nodes(
         page_size=page_size
     )
 
-@app.get("/api/node/{node_id:path}", response_model=NodeInfo)
+@app.get("/api/node/{node_id:path}", response_model=None, responses={200: {"model": NodeInfo}})
 async def get_node(node_id: str):
     """Get detailed information about a specific node"""
     # Decode URL encoding
@@ -227,7 +275,7 @@ async def get_children(node_id: str):
     
     return {"children": child_nodes}
 
-@app.get("/api/subgraph/{node_id:path}", response_model=SubgraphResponse)
+@app.get("/api/subgraph/{node_id:path}", response_model=None, responses={200: {"model": SubgraphResponse}})
 async def get_subgraph(
     node_id: str,
     depth: int = Query(2, ge=1, le=5, description="Depth of subgraph")
@@ -1,12 +1,48 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
+import anyio
+import gc
+import gzip
 import json
+import os
+import pickle
+import sys
+import threading
 import urllib.parse
-from collections import defaultdict, deque
-from typing import List, Dict, Optional
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict, deque
+from functools import lru_cache, wraps
+from pathlib import Path
+from itertools import accumulate, chain
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+try:
+    import simdjson
+except ImportError:  # hp.json is parsed eagerly with orjson/json instead
+    simdjson = None
+
+try:
+    import orjson
+except ImportError:  # e.g. PyPy, where orjson has no wheels
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # subgraphs fall back to the pure-Python BFS
+    njit = None
+
+try:
+    import brotli
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # responses are gzip-compressed only
+    brotli = None
+    BrotliMiddleware = None
 
 app = FastAPI(title="HPO API", version="1.0.0")
 
@@ -19,16 +55,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses; the JSON repeats keys and the HPO URI prefix heavily.
+# Search and subgraph bodies are compressed (and cached) by their handlers
+# instead, which the middleware leaves alone since they set Content-Encoding.
+COMPRESS_MIN_SIZE = 512
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE, compresslevel=5)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="."), name="static")
 
+# Node ids are stored without this prefix; output adds it back
+PREFIX = "http://purl.obolibrary.org/obo/"
+
 # Global data storage
-hpo_data = None
 nodes = {}
 edges = []
-parent_children = defaultdict(list)
-child_parents = defaultdict(list)
 hpo_stats = {}
+# Struct-of-arrays view: node index <-> id, relations as CSR (indptr, indices)
+node_ids = []
+id_to_idx = {}
+parent_indptr = parent_indices = None
+child_indptr = child_indices = None
+# Search data: every node's lowercased label, ID and synonyms ("haystack"),
+# concatenated into one string, where node idx spans
+# search_blob[haystack_offsets[idx]:haystack_offsets[idx + 1] - 1]
+search_blob = ''
+haystack_offsets = []
+label_lengths = []  # len(label), the relevance tie-breaker
+label_ends = []  # len(label.lower()), where the label ends in its haystack
+search_index = defaultdict(set)
+
+# Parsed graph cache, rebuilt whenever hp.json is newer. Bump the version
+# whenever the layout of the cached globals changes. Only builtin and numpy
+# types are pickled, so the cache doesn't depend on this module's import name
+# (`hpo_backend` under gunicorn, `__main__` when run directly).
+HPO_DATA_PATH = 'hp.json'
+CACHE_PATH = 'hp.cache.pkl'
+CACHE_VERSION = 4
+CACHED_GLOBALS = (
+    'nodes', 'edges', 'node_ids', 'id_to_idx',
+    'parent_indptr', 'parent_indices', 'child_indptr', 'child_indices',
+    'search_blob', 'haystack_offsets', 'label_lengths', 'label_ends',
+    'search_index',
+)
+
+# The data never changes after load, so clients and proxies may cache responses
+CACHE_HEADERS = {"Cache-Control": "public, max-age=86400"}
+# Per-worker memory budgets for cached (compressed) response bodies
+SUBGRAPH_CACHE_BYTES = 32 * 1024 * 1024
+SEARCH_CACHE_BYTES = 8 * 1024 * 1024
+
+class Node(NamedTuple):
+    """Immutable record stored in `nodes` for each HPO term"""
+    label: str
+    definition: str
+    synonyms: Tuple[str, ...]
+    json_body: bytes  # Pre-serialized NodeInfo
 
 # Pydantic models
 class NodeInfo(BaseModel):
@@ -50,46 +135,422 @@ class SubgraphResponse(BaseModel):
     nodes: List[NodeInfo]
     edges: List[Dict[str, str]]
 
-@app.on_event("startup")
-async def load_hpo_data():
-    """Load and process HPO data on startup"""
-    global hpo_data, nodes, edges, parent_children, child_parents, hpo_stats
+def read_json_file(path):
+    """Parse a JSON file, lazily with simdjson or else with orjson's C parser.
+    
+    simdjson documents only create Python objects for the values actually
+    read, so the hp.json fields we never look at are never materialized.
+    """
+    if simdjson is not None:
+        return simdjson.Parser().load(path)
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def dump_json(obj):
+    """Serialize to compact JSON bytes, matching FastAPI's default encoding"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def to_short_id(node_id):
+    """Strip the OBO prefix from a full node URI (other URIs are kept whole)"""
+    return node_id[len(PREFIX):] if node_id.startswith(PREFIX) else node_id
+
+def to_full_id(short_id):
+    """Rebuild the full URI of a stored node id"""
+    return short_id if '://' in short_id else PREFIX + short_id
+
+def json_response(body):
+    """Return pre-serialized JSON bytes as a cacheable response"""
+    return Response(content=body, media_type='application/json', headers=CACHE_HEADERS)
+
+def accepted_encoding(request):
+    """The encoding to compress a response with, picked like the middleware does"""
+    accept_encoding = request.headers.get('accept-encoding', '')
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding):
+    """Compress a JSON body with the middleware's settings; returns (body, encoding used)"""
+    if encoding is None or len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+    if encoding == 'br':
+        return brotli.compress(body, mode=brotli.MODE_TEXT, quality=4, lgwin=22), encoding
+    return gzip.compress(body, compresslevel=5, mtime=0), encoding
+
+def encoded_json_response(body, encoding):
+    """Return a JSON body compressed by compress_body as a cacheable response"""
+    headers = dict(CACHE_HEADERS, Vary='Accept-Encoding')
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type='application/json', headers=headers)
+
+def bytes_lru_cache(max_bytes, size=len):
+    """Like lru_cache for functions returning bytes, but bounded by the total
+    size of the cached results rather than their number. `size` gives the
+    byte size of a result that isn't plain bytes."""
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()  # Handlers call this from the threadpool
+        cached_bytes = 0
+        
+        @wraps(func)
+        def wrapper(*args):
+            nonlocal cached_bytes
+            with lock:
+                body = cache.get(args)
+                if body is not None:
+                    cache.move_to_end(args)
+                    return body
+            
+            body = func(*args)
+            body_bytes = size(body)
+            if body_bytes > max_bytes:
+                return body
+            with lock:
+                if args not in cache:
+                    cache[args] = body
+                    cached_bytes += body_bytes
+                    # Evict least recently used bodies until back under budget
+                    while cached_bytes > max_bytes:
+                        _, evicted = cache.popitem(last=False)
+                        cached_bytes -= size(evicted)
+            return body
+        
+        return wrapper
+    return decorator
+
+def join_node_json(node_idxs):
+    """Join the pre-serialized JSON of the given nodes into a JSON array body"""
+    return b','.join(nodes[node_ids[idx]].json_body for idx in node_idxs)
+
+def build_csr(neighbor_lists):
+    """Pack per-node lists of neighbor indexes into CSR (indptr, indices) int32 arrays"""
+    indptr = np.fromiter(accumulate(map(len, neighbor_lists), initial=0),
+                         dtype=np.int32, count=len(neighbor_lists) + 1)
+    indices = np.fromiter(chain.from_iterable(neighbor_lists), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+def neighbors(indptr, indices, idx):
+    """Return the neighbor indexes of node idx from a CSR relation"""
+    return indices[indptr[idx]:indptr[idx + 1]].tolist()
+
+def bfs_subgraph(start, depth, p_indptr, p_indices, c_indptr, c_indices):
+    """Breadth-first walk over both CSR relations, up to depth levels from start.
+    
+    Returns the visited node indexes in discovery order and the (child, parent)
+    edges touching every node expanded below the depth limit. An edge is emitted
+    by whichever endpoint is expanded first, so no duplicate check is needed.
+    Compiled with numba when it is installed.
+    """
+    n = p_indptr.shape[0] - 1
+    level = np.full(n, -1, dtype=np.int32)
+    expanded = np.zeros(n, dtype=np.uint8)
+    order = np.empty(n, dtype=np.int32)
+    edge_from = np.empty(p_indices.shape[0], dtype=np.int32)
+    edge_to = np.empty(p_indices.shape[0], dtype=np.int32)
+    
+    order[0] = start
+    level[start] = 0
+    head, tail, num_edges = 0, 1, 0
+    while head < tail:
+        current = order[head]
+        head += 1
+        if level[current] >= depth:
+            continue
+        expanded[current] = 1
+        
+        for k in range(p_indptr[current], p_indptr[current + 1]):
+            parent = p_indices[k]
+            if level[parent] < 0:
+                level[parent] = level[current] + 1
+                order[tail] = parent
+                tail += 1
+            elif expanded[parent]:
+                continue
+            edge_from[num_edges] = current
+            edge_to[num_edges] = parent
+            num_edges += 1
+        
+        for k in range(c_indptr[current], c_indptr[current + 1]):
+            child = c_indices[k]
+            if level[child] < 0:
+                level[child] = level[current] + 1
+                order[tail] = child
+                tail += 1
+            elif expanded[child]:
+                continue
+            edge_from[num_edges] = child
+            edge_to[num_edges] = current
+            num_edges += 1
+    
+    return order[:tail], edge_from[:num_edges], edge_to[:num_edges]
+
+if njit is not None:
+    # nogil lets concurrent subgraph requests run in parallel on the threadpool
+    bfs_subgraph = njit(cache=True, nogil=True)(bfs_subgraph)
+
+def build_search_index():
+    """Build the search haystacks and index them by trigram"""
+    global search_blob
+    
+    haystacks = []
+    offset = 0
+    for idx, (node_id, node) in enumerate(nodes.items()):
+        fields = [node.label.lower(), node_id.lower()]
+        fields.extend(s.lower() for s in node.synonyms)
+        # Fields (and nodes) are newline-separated so matches stay within one field
+        haystack = '\n'.join(fields)
+        haystacks.append(haystack)
+        haystack_offsets.append(offset)
+        offset += len(haystack) + 1
+        label_lengths.append(len(node.label))
+        label_ends.append(len(fields[0]))
+        for field in fields:
+            for i in range(len(field) - 2):
+                search_index[field[i:i + 3]].add(idx)
+    
+    haystack_offsets.append(offset)
+    search_blob = '\n'.join(haystacks) + '\n'
+
+def scan_matches(query):
+    """Scan all haystacks for the lowercased query in one pass over search_blob.
+    
+    str.find runs the substring search in C across the whole blob, so the
+    Python loop only runs once per matching node rather than once per node.
+    """
+    matches = []
+    find = search_blob.find
+    pos = find(query)
+    while pos >= 0:
+        idx = bisect_right(haystack_offsets, pos) - 1
+        start = haystack_offsets[idx]
+        matches.append((0 if pos - start < label_ends[idx] else 1, label_lengths[idx], idx))
+        # One hit per node is enough; resume at the next node's haystack
+        pos = find(query, haystack_offsets[idx + 1])
+    return matches
+
+def find_matches(query):
+    """Return (rank, label length, index) for each node whose label, ID or synonyms contain the lowercased query"""
+    # No field contains a newline, and matching one could span two nodes
+    if '\n' in query:
+        return []
+    
+    # Too short for trigrams: scan every node
+    if len(query) < 3:
+        return scan_matches(query)
+    
+    postings = [search_index.get(query[i:i + 3]) for i in range(len(query) - 2)]
+    if not all(postings):
+        return []
+    postings.sort(key=len)
+    candidates = postings[0].intersection(*postings[1:])
+
+    # Trigrams only narrow the candidates; confirm the full substring match.
+    # The label is the haystack's first field, so the match position also
+    # tells whether the label itself matched (those rank first).
+    matches = []
+    for idx in candidates:
+        start = haystack_offsets[idx]
+        pos = search_blob.find(query, start, haystack_offsets[idx + 1])
+        if pos >= 0:
+            matches.append((0 if pos - start < label_ends[idx] else 1, label_lengths[idx], idx))
+    return matches
+
+@lru_cache(maxsize=512)
+def ranked_matches(query):
+    """Indexes of all nodes matching the lowercased query, most relevant first.
+    
+    Kept as a packed int32 array so cached results stay small; callers only
+    turn the page they return into Python objects.
+    """
+    # Sort by relevance (label matches first, then by label length, then file order)
+    matches = find_matches(query)
+    matches.sort()
+    ranked = np.fromiter((idx for _, _, idx in matches), dtype=np.int32, count=len(matches))
+    ranked.flags.writeable = False  # Shared by every request for this query
+    return ranked
+
+@bytes_lru_cache(SEARCH_CACHE_BYTES, size=lambda result: len(result[0]))
+def search_page_json(query, page, page_size, encoding):
+    """One page of search results compressed for the given encoding, as (body, encoding used)"""
+    matching_idxs = ranked_matches(query)
+    
+    # Pagination
+    start_index = (page - 1) * page_size
+    end_index = start_index + page_size
+    paginated_idxs = matching_idxs[start_index:end_index].tolist()
+    
+    return compress_body(b'{"nodes":[%s],"total":%d,"page":%d,"page_size":%d}' % (
+        join_node_json(paginated_idxs), len(matching_idxs), page, page_size), encoding)
+
+def walk_subgraph(start, depth):
+    """Pure-Python equivalent of bfs_subgraph for when numba isn't installed"""
+    visited = {start}
+    seen_edges = set()
+    result_idxs = [start]
+    result_edges = []
+    queue = deque([(start, 0)])
+    
+    while queue:
+        current, level = queue.popleft()
+        
+        if level < depth:
+            # Add parents
+            for parent in neighbors(parent_indptr, parent_indices, current):
+                if parent not in visited:
+                    visited.add(parent)
+                    result_idxs.append(parent)
+                    queue.append((parent, level + 1))
+                # Add each edge once
+                if (current, parent) not in seen_edges:
+                    seen_edges.add((current, parent))
+                    result_edges.append((current, parent))
+            
+            # Add children
+            for child in neighbors(child_indptr, child_indices, current):
+                if child not in visited:
+                    visited.add(child)
+                    result_idxs.append(child)
+                    queue.append((child, level + 1))
+                if (child, current) not in seen_edges:
+                    seen_edges.add((child, current))
+                    result_edges.append((child, current))
+    
+    return result_idxs, result_edges
+
+def subgraph_json(start, depth):
+    """Serialized subgraph of the given depth around node index start"""
+    if njit is not None:
+        order, edge_from, edge_to = bfs_subgraph(
+            start, depth, parent_indptr, parent_indices, child_indptr, child_indices)
+        result_idxs = order.tolist()
+        result_edges = zip(edge_from.tolist(), edge_to.tolist())
+    else:
+        result_idxs, result_edges = walk_subgraph(start, depth)
+    
+    edges_json = dump_json([{'from': to_full_id(node_ids[child]), 'to': to_full_id(node_ids[parent])}
+                            for child, parent in result_edges])
+    return b'{"nodes":[%s],"edges":%s}' % (join_node_json(result_idxs), edges_json)
+
+# Subgraph bodies can reach several MB at depth 5, so the cache is bounded by size
+@bytes_lru_cache(SUBGRAPH_CACHE_BYTES, size=lambda result: len(result[0]))
+def encoded_subgraph_json(start, depth, encoding):
+    """subgraph_json compressed for the given encoding, as (body, encoding used)"""
+    return compress_body(subgraph_json(start, depth), encoding)
+
+def parse_hpo_data():
+    """Build the graph, records and search structures from hp.json"""
+    global parent_indptr, parent_indices, child_indptr, child_indices
+    
+    # Only the graph is kept; the parsed document is released after ingest
+    graph = read_json_file(HPO_DATA_PATH)['graphs'][0]
+
+    # Process nodes
+    node_fields = []
+    for node in graph['nodes']:
+        node_ids.append(sys.intern(to_short_id(node['id'])))
+        meta = node.get('meta', {})
+        node_fields.append((
+            node.get('lbl') or 'Unknown',
+            meta.get('definition', {}).get('val', ''),
+            tuple(s['val'] for s in meta.get('synonyms', []))
+        ))
+    id_to_idx.update((node_id, idx) for idx, node_id in enumerate(node_ids))
+
+    # Process edges into per-node lists of neighbor indexes
+    parents = [[] for _ in node_ids]
+    children = [[] for _ in node_ids]
+    for edge in graph['edges']:
+        if edge['pred'] == 'is_a':
+            child = id_to_idx.get(to_short_id(edge['sub']))
+            parent = id_to_idx.get(to_short_id(edge['obj']))
+            if child is not None and parent is not None:
+                parents[child].append(parent)
+                children[parent].append(child)
+                edges.append((child, parent))
+
+    # Pack the relations as CSR arrays
+    parent_indptr, parent_indices = build_csr(parents)
+    child_indptr, child_indices = build_csr(children)
+
+    # Freeze each node into a compact record, serialized once for the
+    # read endpoints to join
+    for idx, (label, definition, synonyms) in enumerate(node_fields):
+        node_id = node_ids[idx]
+        nodes[node_id] = Node(
+            label=label,
+            definition=definition,
+            synonyms=synonyms,
+            json_body=dump_json({
+                'id': to_full_id(node_id),
+                'label': label,
+                'full_id': node_id,
+                'definition': definition,
+                'synonyms': synonyms,
+                'parents': [to_full_id(node_ids[p]) for p in parents[idx]],
+                'children': [to_full_id(node_ids[c]) for c in children[idx]]
+            })
+        )
+
+    build_search_index()
+
+def load_cache():
+    """Restore the parsed globals from the pickle cache; returns False if it is stale or unusable"""
+    if not os.path.exists(CACHE_PATH) or os.path.getmtime(CACHE_PATH) < os.path.getmtime(HPO_DATA_PATH):
+        return False
+    try:
+        with open(CACHE_PATH, 'rb') as f:
+            version, state = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable HPO cache: {e}")
+        return False
+    
+    if version != CACHE_VERSION:
+        return False
+    state['nodes'] = {node_id: Node._make(fields) for node_id, fields in state['nodes'].items()}
+    globals().update(state)
+    return True
+
+def save_cache():
+    """Pickle the parsed globals next to hp.json for the next startup"""
+    state = {name: globals()[name] for name in CACHED_GLOBALS}
+    state['nodes'] = {node_id: tuple(node) for node_id, node in nodes.items()}
+    tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, state), f, protocol=5)
+        # Atomic, so concurrently starting processes never read a partial file
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"Could not write HPO cache: {e}")
+
+def load_hpo_data():
+    """Load and process HPO data, from the pickle cache when it is current"""
+    global hpo_stats
     
     print("Loading HPO data...")
     try:
-        with open('hp.json', 'r') as f:
-            hpo_data = json.load(f)
-
-        # Process nodes
-        for node in hpo_data['graphs'][0]['nodes']:
-            node_id = node['id']
-            nodes[node_id] = {
-                'id': node_id,
-                'label': node.get('lbl') or 'Unknown',
-                'full_id': node_id.replace('http://purl.obolibrary.org/obo/', ''),
-                'definition': node.get('meta', {}).get('definition', {}).get('val', ''),
-                'synonyms': [s['val'] for s in node.get('meta', {}).get('synonyms', [])],
-                'parents': [],
-                'children': []
-            }
-
-        # Process edges and build relationships
-        for edge in hpo_data['graphs'][0]['edges']:
-            if edge['pred'] == 'is_a':
-                child_id = edge['sub']
-                parent_id = edge['obj']
-                if child_id in nodes and parent_id in nodes:
-                    nodes[child_id]['parents'].append(parent_id)
-                    nodes[parent_id]['children'].append(child_id)
-                    parent_children[parent_id].append(child_id)
-                    child_parents[child_id].append(parent_id)
-                    edges.append({'from': child_id, 'to': parent_id})
+        if load_cache():
+            print(f"Using cached HPO data from {CACHE_PATH}")
+        else:
+            parse_hpo_data()
+            save_cache()
+
+        if njit is not None:
+            # Compile the BFS now so the first request (and every forked worker) doesn't
+            bfs_subgraph(0, 1, parent_indptr, parent_indices, child_indptr, child_indices)
 
         # Calculate statistics
         hpo_stats = {
             'total_nodes': len(nodes),
             'total_edges': len(edges),
-            'root_node': "http://purl.obolibrary.org/obo/HP_0000001"
+            'root_node': to_full_id('HP_0000001')
         }
         
         print(f"Loaded {len(nodes)} nodes and {len(edges)} edges")
@@ -98,203 +559,91 @@ async def load_hpo_data():
         print(f"Error loading HPO data: {e}")
         raise
 
+# Load at import time rather than on startup: with gunicorn --preload this
+# runs once in the master and the forked workers share the read-only graph
+# copy-on-write. Freezing moves it out of the GC's reach so collections in
+# the workers don't touch (and copy) those pages. Run as a script, this copy
+# of the module only starts uvicorn, which imports and loads `hpo_backend`.
+if __name__ != "__main__":
+    load_hpo_data()
+    gc.freeze()
+
+# Search and subgraph are CPU-bound, so they are plain `def` handlers that
+# FastAPI runs on anyio's threadpool instead of blocking the event loop
+@app.on_event("startup")
+async def configure_threadpool():
+    """Raise the threadpool size from anyio's default of 40"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 64
+
 @app.get("/api/stats")
 async def get_stats():
     """Get HPO statistics"""
     return hpo_stats
 
-@app.get("/api/search", response_model=SearchResult)
-async def search_hpo_terms(
+@app.get("/api/search", response_model=None, responses={200: {"model": SearchResult}})
+def search_hpo_terms(
+    request: Request,
     q: str = Query(..., min_length=2, description="Search query"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Results per page")
 ):
     """Search HPO terms with pagination"""
-    query = q.lower()
-    matching_nodes = []
-    
-    for node_id, node_data in nodes.items():
-        # Search in label, full_id, and synonyms
-        if (query in node_data['label'].lower() or 
-            query in node_data['full_id'].lower() or 
-            any(query in s.lower() for s in node_data['synonyms'])):
-            
-            matching_nodes.append(NodeInfo(
-                id=node_id,
-                label=node_data['label'],
-                full_id=node_data['full_id'],
-                definition=node_data['definition'],
-                synonyms=node_data['synonyms'],
-                parents=node_data['parents'],
-                children=node_data['children']
-            ))
-    
-    # Sort by relevance (exact matches first, then by label length)
-    matching_nodes.sort(key=lambda x: (
-        0 if query in x.label.lower() else 1,
-        len(x.label)
-    ))
-    
-    # Pagination
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
-    paginated_nodes = matching_nodes[start_index:end_index]
-    
-    return SearchResult(
-        nodes=paginated_nodes,
-        total=len(matching_nodes),
-        page=page,
-        page_size=page_size
-    )
-
-@app.get("/api/node/{node_id:path}", response_model=NodeInfo)
-async def get_node(node_id: str):
+    return encoded_json_response(*search_page_json(q.lower(), page, page_size, accepted_encoding(request)))
+
+# The node lookups are registered as plain Starlette routes: they only return
+# pre-serialized bytes, so FastAPI's parameter parsing and response handling is
+# pure overhead. (They are therefore not listed in the OpenAPI docs.)
+async def get_node(request: Request):
     """Get detailed information about a specific node"""
-    decoded_node_id = urllib.parse.unquote(node_id)
+    decoded_node_id = urllib.parse.unquote(request.path_params['node_id'])
+    short_id = to_short_id(decoded_node_id)
     
-    if decoded_node_id not in nodes:
+    if short_id not in nodes:
         raise HTTPException(status_code=404, detail=f"Node not found: {decoded_node_id}")
     
-    node = nodes[decoded_node_id]
-    return NodeInfo(
-        id=decoded_node_id,
-        label=node['label'],
-        full_id=node['full_id'],
-        definition=node['definition'],
-        synonyms=node['synonyms'],
-        parents=node['parents'],
-        children=node['children']
-    )
-
-@app.get("/api/node/{node_id:path}/parents")
-async def get_parents(node_id: str):
+    return json_response(nodes[short_id].json_body)
+
+app.add_route("/api/node/{node_id:path}", get_node, methods=["GET"])
+
+async def get_parents(request: Request):
     """Get parent nodes of a specific node"""
-    decoded_node_id = urllib.parse.unquote(node_id)
+    short_id = to_short_id(urllib.parse.unquote(request.path_params['node_id']))
     
-    if decoded_node_id not in nodes:
+    if short_id not in nodes:
         raise HTTPException(status_code=404, detail="Node not found")
     
-    parent_ids = nodes[decoded_node_id]['parents']
-    parent_nodes = []
-    
-    for parent_id in parent_ids:
-        if parent_id in nodes:
-            parent = nodes[parent_id]
-            parent_nodes.append(NodeInfo(
-                id=parent_id,
-                label=parent['label'],
-                full_id=parent['full_id'],
-                definition=parent['definition'],
-                synonyms=parent['synonyms'],
-                parents=parent['parents'],
-                children=parent['children']
-            ))
+    parent_idxs = neighbors(parent_indptr, parent_indices, id_to_idx[short_id])
     
-    return {"parents": parent_nodes}
+    return json_response(b'{"parents":[%s]}' % join_node_json(parent_idxs))
 
-@app.get("/api/node/{node_id:path}/children")
-async def get_children(node_id: str):
+app.add_route("/api/node/{node_id:path}/parents", get_parents, methods=["GET"])
+
+async def get_children(request: Request):
     """Get child nodes of a specific node"""
-    decoded_node_id = urllib.parse.unquote(node_id)
+    short_id = to_short_id(urllib.parse.unquote(request.path_params['node_id']))
     
-    if decoded_node_id not in nodes:
+    if short_id not in nodes:
         raise HTTPException(status_code=404, detail="Node not found")
     
-    child_ids = nodes[decoded_node_id]['children']
-    child_nodes = []
-    
-    for child_id in child_ids:
-        if child_id in nodes:
-            child = nodes[child_id]
-            child_nodes.append(NodeInfo(
-                id=child_id,
-                label=child['label'],
-                full_id=child['full_id'],
-                definition=child['definition'],
-                synonyms=child['synonyms'],
-                parents=child['parents'],
-                children=child['children']
-            ))
+    child_idxs = neighbors(child_indptr, child_indices, id_to_idx[short_id])
     
-    return {"children": child_nodes}
+    return json_response(b'{"children":[%s]}' % join_node_json(child_idxs))
 
-@app.get("/api/subgraph/{node_id:path}", response_model=SubgraphResponse)
-async def get_subgraph(
+app.add_route("/api/node/{node_id:path}/children", get_children, methods=["GET"])
+
+@app.get("/api/subgraph/{node_id:path}", response_model=None, responses={200: {"model": SubgraphResponse}})
+def get_subgraph(
+    request: Request,
     node_id: str,
     depth: int = Query(2, ge=1, le=5, description="Depth of subgraph")
 ):
     """Get a subgraph around a specific node for visualization"""
-    decoded_node_id = urllib.parse.unquote(node_id)
+    short_id = to_short_id(urllib.parse.unquote(node_id))
     
-    if decoded_node_id not in nodes:
+    if short_id not in nodes:
         raise HTTPException(status_code=404, detail="Node not found")
     
-    visited = set()
-    result_nodes = []
-    result_edges = []
-    queue = deque([(decoded_node_id, 0)])
-    visited.add(decoded_node_id)
-    
-    # Add the central node first
-    central_node_data = nodes[decoded_node_id]
-    result_nodes.append(NodeInfo(
-        id=central_node_data['id'],
-        label=central_node_data['label'],
-        full_id=central_node_data['full_id'],
-        definition=central_node_data['definition'],
-        synonyms=central_node_data['synonyms'],
-        parents=central_node_data['parents'],
-        children=central_node_data['children']
-    ))
-    
-    while queue:
-        current_id, level = queue.popleft()
-        current_node = nodes[current_id]
-        
-        if level < depth:
-            # Add parents
-            for parent_id in current_node['parents']:
-                if parent_id not in visited:
-                    visited.add(parent_id)
-                    parent_data = nodes[parent_id]
-                    result_nodes.append(NodeInfo(
-                        id=parent_data['id'],
-                        label=parent_data['label'],
-                        full_id=parent_data['full_id'],
-                        definition=parent_data['definition'],
-                        synonyms=parent_data['synonyms'],
-                        parents=parent_data['parents'],
-                        children=parent_data['children']
-                    ))
-                    result_edges.append({'from': current_id, 'to': parent_id})
-                    queue.append((parent_id, level + 1))
-                else:
-                    # Ensure edge is added if not already present
-                    if not any(e['from'] == current_id and e['to'] == parent_id for e in result_edges):
-                        result_edges.append({'from': current_id, 'to': parent_id})
-            
-            # Add children
-            for child_id in current_node['children']:
-                if child_id not in visited:
-                    visited.add(child_id)
-                    child_data = nodes[child_id]
-                    result_nodes.append(NodeInfo(
-                        id=child_data['id'],
-                        label=child_data['label'],
-                        full_id=child_data['full_id'],
-                        definition=child_data['definition'],
-                        synonyms=child_data['synonyms'],
-                        parents=child_data['parents'],
-                        children=child_data['children']
-                    ))
-                    result_edges.append({'from': child_id, 'to': current_id})
-                    queue.append((child_id, level + 1))
-                else:
-                    # Ensure edge is added if not already present
-                    if not any(e['from'] == child_id and e['to'] == current_id for e in result_edges):
-                        result_edges.append({'from': child_id, 'to': current_id})
-    
-    return SubgraphResponse(nodes=result_nodes, edges=result_edges)
+    return encoded_json_response(*encoded_subgraph_json(id_to_idx[short_id], depth, accepted_encoding(request)))
 
 @app.get("/")
 async def root():
@@ -325,4 +674,4 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run("hpo_backend:app", host="0.0.0.0", port=8000)
@@ -10,15 +10,26 @@ import subprocess
 import time
 from pathlib import Path
 
+def default_workers(cap=4):
+    """Worker count for the CPUs this container may actually run on"""
+    # os.cpu_count() reports the host's cores, not the container's allotment
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # e.g. macOS and Windows
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, cap))
+
 def main():
     """Start the HPO Tree Visualizer on Railway"""
     
     # Get port from Railway environment variable
     port = os.getenv("PORT", "8000")
     host = "0.0.0.0"
+    workers = os.getenv("WEB_CONCURRENCY", str(default_workers()))
     
     print(f"🚀 Starting HPO Tree Visualizer on {host}:{port}")
     print(f"📊 Environment: {os.getenv('ENVIRONMENT', 'development')}")
+    print(f"👷 Workers: {workers}")
     
     # Check if hp.json exists
     if not Path("hp.json").exists():
@@ -32,13 +43,15 @@ def main():
     try:
         print("🔄 Starting FastAPI server...")
         subprocess.run([
-            sys.executable, "-m", "uvicorn", 
-            "hpo_backend:app", 
-            "--host", host, 
-            "--port", port,
-            "--workers", "1",  # Single worker for Railway
-            "--timeout-keep-alive", "30",
-            "--timeout-graceful-shutdown", "30"
+            sys.executable, "-m", "gunicorn",
+            "hpo_backend:app",
+            "--bind", f"{host}:{port}",
+            # Uvicorn workers pick up uvloop and httptools automatically
+            "--worker-class", "uvicorn.workers.UvicornWorker",
+            "--workers", workers,
+            "--preload",  # Load hp.json once in the master, share it with workers
+            "--keep-alive", "30",
+            "--graceful-timeout", "30"
         ])
     except KeyboardInterrupt:
         print("\n👋 Shutting down HPO Tree Visualizer...")